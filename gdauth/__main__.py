@@ -115,7 +115,9 @@ def select(args):
                 log.warning(f'You selected index {selected_index}: {selected_key}: {selected_value}')
                 args.ep_uuid = selected_value
                 # Update token file
-                os.remove(os.path.join(str(pathlib.Path.home()), 'token.npy'))
+                for token_file in (globus.TOKEN_FILE, globus.TOKEN_LOCK_FILE, globus.LEGACY_TOKEN_FILE):
+                    if os.path.exists(token_file):
+                        os.remove(token_file)
                 log.error("A new token will be generated next time you run GDAuth")
             else:
                 log.warning("Invalid index. Please select a valid index.")
@@ -3,7 +3,6 @@ import sys
 import pathlib
 import argparse
 import configparser
-import numpy as np
 
 from pathlib import Path
 
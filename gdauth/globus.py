@@ -1,9 +1,17 @@
 import os
 import pathlib
 import time
+import pickle
+import functools
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import globus_sdk
-import numpy as np
 from globus_sdk.scopes import TransferScopes
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 from gdauth import log
 
@@ -15,20 +23,158 @@ __all__ = ['refresh_globus_token',
            'create_clients',
            'create_dir',
            'check_folder_exists',
+           'check_folder_exists_with',
            'get_user_id',
+           'get_user_id_with',
            'share',
            'find_endpoints',
+           'find_endpoint_uuid',
            'create_folder_link',
            'create_links',
            'find_items'
            ]
 
+# Token file storing the Globus tokens as {resource server: token data}
+TOKEN_FILE = os.path.join(str(pathlib.Path.home()), '.globus_token.pkl')
+# Lock file serializing TOKEN_FILE updates
+TOKEN_LOCK_FILE = TOKEN_FILE + '.lock'
+# Token file written by older GDAuth versions, migrated on first use
+LEGACY_TOKEN_FILE = os.path.join(str(pathlib.Path.home()), 'token.npy')
+
+# In-process cache of the tokens: {(app_uuid, ep_uuid): (tokens, transfer_rt, transfer_at, expires_at_s)}
+_TOKEN_CACHE = {}
+# Serializes token loads/refreshes so concurrent callers do not refresh twice
+_TOKEN_LOCK = threading.Lock()
+# Skip the token file when the cached access token is valid for at least this many seconds
+_TOKEN_MARGIN_S = 300
+
+# Number of attempts for Globus requests failing with a network error
+_NETWORK_RETRIES = 3
+
+# Static part of the access rule used to share a directory, completed in share()
+_ACL_RULE_TEMPLATE = {
+    'DATA_TYPE': 'access',
+    'principal_type': 'identity',
+    'permissions': 'r',
+    'notify_message': ''
+}
+
+# In-process cache of the endpoints HTTPS server: {ep_uuid: server host name}
+_TLSFTP_SERVER_CACHE = {}
+
+
+@contextlib.contextmanager
+def _token_file_lock():
+    """
+    Serialize TOKEN_FILE updates from other GDAuth processes
+    """
+
+    with os.fdopen(os.open(TOKEN_LOCK_FILE, os.O_WRONLY | os.O_CREAT, 0o600), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _write_token(tokens):
+    """
+    Write the Globus tokens to TOKEN_FILE. The tokens are written to a temporary file 
+    readable only by the user and moved in place so that a crash never leaves a 
+    partial TOKEN_FILE behind
+    """
+
+    tmp_file = '%s.%d.tmp' % (TOKEN_FILE, os.getpid())
+    # a stale temporary file may have other permissions: never reuse it
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(tokens, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    os.replace(tmp_file, TOKEN_FILE)
+
+
+def _save_token(tokens):
+    """
+    Save the Globus tokens to TOKEN_FILE
+    """
+
+    with _token_file_lock():
+        _write_token(tokens)
+
+
+def _merge_token(refreshed, tokens):
+    """
+    Merge the refreshed tokens into TOKEN_FILE. The file is re-read under the lock so 
+    that tokens refreshed meanwhile by other processes are kept; tokens is used when 
+    TOKEN_FILE is missing
+
+    Returns
+    -------
+    dictionary : {resource server : token data} as saved
+    """
+
+    with _token_file_lock():
+        try:
+            with open(TOKEN_FILE, 'rb') as f:
+                tokens = pickle.load(f)
+        except FileNotFoundError:
+            pass
+        tokens = dict(tokens)
+        tokens.update(refreshed)
+        _write_token(tokens)
+
+    return tokens
+
+
+def _load_token():
+    """
+    Load the Globus tokens from TOKEN_FILE, migrating LEGACY_TOKEN_FILE if needed
+
+    Returns
+    -------
+    dictionary : {resource server : token data}
+    """
+
+    try:
+        with open(TOKEN_FILE, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        if not os.path.exists(LEGACY_TOKEN_FILE):
+            raise
+    try:
+        # numpy is only needed to read the legacy token file
+        import numpy as np
+    except ImportError:
+        log.warning('numpy is not installed: ignoring legacy Globus token %s' % LEGACY_TOKEN_FILE)
+        raise FileNotFoundError(TOKEN_FILE)
+    log.warning('Migrating Globus token from %s to %s' % (LEGACY_TOKEN_FILE, TOKEN_FILE))
+    tokens = np.load(LEGACY_TOKEN_FILE, allow_pickle=True).item().by_resource_server
+    _save_token(tokens)
+    os.remove(LEGACY_TOKEN_FILE)
+
+    return tokens
+
+
+def _cached_token(app_uuid, ep_uuid):
+    """
+    Return the cached token tuple if the access token is still valid for more than 
+    _TOKEN_MARGIN_S seconds, None otherwise
+    """
+
+    cached = _TOKEN_CACHE.get((app_uuid, ep_uuid))
+    if cached is not None and cached[3] - time.time() > _TOKEN_MARGIN_S:
+        return cached
+    return None
+
 
 def refresh_globus_token(app_uuid, ep_uuid):
     """
-    Verify that existing Globus token exists and it is still valid, 
-    if not creates & saves or refresh & save the globus token. 
-    The token is valid for 48h.
+    Verify that existing Globus token exists, if not creates & saves the globus token. 
+    The token is valid for 48h and is kept in memory until it is about to expire. 
+    Expired access tokens are refreshed by the authorizers built in create_clients.
 
     Parameters
     ----------
@@ -37,60 +183,121 @@ def refresh_globus_token(app_uuid, ep_uuid):
 
     Returns
     -------
-    ac, tc tokens : string
+    tokens       : {resource server : token data}
+    transfer_rt  : Transfer refresh token
+    transfer_at  : Transfer access token
+    expires_at_s : Transfer access token expiration time in seconds since the epoch
+    """
+
+    cached = _cached_token(app_uuid, ep_uuid)
+    if cached is not None:
+        return cached
+
+    with _TOKEN_LOCK:
+        # another thread may have refreshed the token while we were waiting
+        cached = _cached_token(app_uuid, ep_uuid)
+        if cached is None:
+            cached = _cache_tokens(app_uuid, ep_uuid, _read_globus_token(app_uuid, ep_uuid))
+
+    return cached
+
+
+def _cache_tokens(app_uuid, ep_uuid, tokens):
+    """
+    Store the tokens and the parsed transfer token fields in _TOKEN_CACHE
+    """
+
+    # let's get stuff for the Globus Transfer service
+    globus_transfer_data = tokens['transfer.api.globus.org']
+    # the refresh token and access token, often abbr. as RT and AT
+    cached = (tokens,
+              globus_transfer_data['refresh_token'],
+              globus_transfer_data['access_token'],
+              globus_transfer_data['expires_at_seconds'])
+    _TOKEN_CACHE[(app_uuid, ep_uuid)] = cached
+
+    return cached
+
+
+@functools.lru_cache(maxsize=8)
+def _auth_client(app_uuid):
+    """
+    Return the native app authorize client, shared by token refreshes and authorizers
+    """
+
+    return globus_sdk.NativeAppAuthClient(app_uuid)
+
+
+def _persist_refreshed(app_uuid, ep_uuid, token_response):
+    """
+    Save the tokens renewed by a RefreshTokenAuthorizer to TOKEN_FILE and _TOKEN_CACHE
+    """
+
+    with _TOKEN_LOCK:
+        tokens = _merge_token(token_response.by_resource_server, _TOKEN_CACHE[(app_uuid, ep_uuid)][0])
+        _cache_tokens(app_uuid, ep_uuid, tokens)
+
+
+def _interactive_new_token(app_uuid, ep_uuid):
+    """
+    Create a new globus token through the interactive login flow and save it to TOKEN_FILE
     """
 
-    globus_token_file=os.path.join(str(pathlib.Path.home()), 'token.npy')
+    client = globus_sdk.NativeAppAuthClient(app_uuid)
+    client.oauth2_start_flow(requested_scopes=[TransferScopes.all, "https://auth.globus.org/scopes/" + ep_uuid + "/https"], refresh_tokens=True)
+
+    log.error('Please go to this URL and login:')
+    log.warning('{0}'.format(client.oauth2_get_authorize_url()))
+
+    auth_code = input('Please enter the code you get after login here: ').strip()
+    tokens = client.oauth2_exchange_code_for_tokens(auth_code).by_resource_server
+    _save_token(tokens)
+    create_clients.cache_clear()
+
+    return tokens
+
+
+def _read_globus_token(app_uuid, ep_uuid):
+    """
+    Load the globus token from TOKEN_FILE, creating a new one if missing
+    """
 
     try:
-        token_response = np.load(globus_token_file, allow_pickle='TRUE').item()
+        return _load_token()
     except FileNotFoundError:
         log.error('Globus token is missing. Creating one')
-        # Creating new token
-        # --------------------------------------------
-        client = globus_sdk.NativeAppAuthClient(app_uuid)
-        client.oauth2_start_flow(requested_scopes=[TransferScopes.all, "https://auth.globus.org/scopes/" + ep_uuid + "/https"], refresh_tokens=True)
+        return _interactive_new_token(app_uuid, ep_uuid)
 
-        log.error('Please go to this URL and login:')
-        log.warning('{0}'.format(client.oauth2_get_authorize_url()))
 
-        get_input = getattr(__builtins__, 'raw_input', input)
-        auth_code = get_input('Please enter the code you get after login here: ').strip() # pythn 3
-        # auth_code = raw_input('Please enter the code you get after login here: ').strip() # python 2.7
-        token_response = client.oauth2_exchange_code_for_tokens(auth_code)
-        # --------------------------------------------
-        np.save(globus_token_file, token_response) 
+def _refresh_token_authorizer(client, token_data, on_refresh):
+    """
+    Create an authorizer renewing the access token in token_data when it expires
+    """
 
-    # let's get stuff for the Globus Transfer service
-    globus_transfer_data = token_response.by_resource_server['transfer.api.globus.org']
-    # the refresh token and access token, often abbr. as RT and AT
-    transfer_rt = globus_transfer_data['refresh_token']
-    transfer_at = globus_transfer_data['access_token']
-    expires_at_s = globus_transfer_data['expires_at_seconds']
+    return globus_sdk.RefreshTokenAuthorizer(token_data['refresh_token'], client, access_token=token_data['access_token'],
+                                             expires_at=token_data['expires_at_seconds'], on_refresh=on_refresh)
 
-    globus_token_life = expires_at_s - time.time()
-    if (globus_token_life < 0):
-        # Creating new token
-        # --------------------------------------------
-        globus_app_id = app_uuid
-        client = globus_sdk.NativeAppAuthClient(globus_app_id)
-        client.oauth2_start_flow(refresh_tokens=True)
 
-        log.error('Please go to this URL and login:')
-        log.warning('{0}'.format(client.oauth2_get_authorize_url()))
+def _create_authorizers(client, ep_uuid, token_tuple, on_refresh):
+    """
+    Create the collection https and transfer authorizers, refreshing their access 
+    tokens now if expired so that later requests never need to refresh concurrently
+    """
 
-        get_input = getattr(__builtins__, 'raw_input', input)
-        auth_code = get_input('Please enter the code you get after login here: ').strip()
-        token_response = client.oauth2_exchange_code_for_tokens(auth_code)
-        # --------------------------------------------
-        np.save(globus_token_file, token_response) 
+    tokens, transfer_rt, transfer_at, expires_at_s = token_tuple
+    https_authorizer = _refresh_token_authorizer(client, tokens[ep_uuid], on_refresh)
+    authorizer = globus_sdk.RefreshTokenAuthorizer(transfer_rt, client, access_token=transfer_at, expires_at=expires_at_s, on_refresh=on_refresh)
+    https_authorizer.ensure_valid_token()
+    authorizer.ensure_valid_token()
 
-    return token_response
+    return https_authorizer, authorizer
 
 
+@functools.lru_cache(maxsize=8)
 def create_clients(app_uuid, ep_uuid):
     """
-    Create authorize and transfer clients
+    Create authorize and transfer clients. The clients are cached per 
+    (app_uuid, ep_uuid) so their HTTP sessions are reused across calls.
 
     Parameters
     ----------
@@ -104,31 +311,46 @@ def create_clients(app_uuid, ep_uuid):
       
     """
 
-    token_response = refresh_globus_token(app_uuid, ep_uuid)
+    token_tuple = refresh_globus_token(app_uuid, ep_uuid)
 
-    log.warning('wget token: %s' % token_response.by_resource_server[ep_uuid]['access_token'])
-    # let's get stuff for the Globus Transfer service
-    globus_transfer_data = token_response.by_resource_server['transfer.api.globus.org']
-    # the refresh token and access token, often abbr. as RT and AT
-    transfer_rt = globus_transfer_data['refresh_token']
-    transfer_at = globus_transfer_data['access_token']
-    expires_at_s = globus_transfer_data['expires_at_seconds']
+    client = _auth_client(app_uuid)
+    # the authorizers refresh expired access tokens and save them with _persist_refreshed
+    on_refresh = functools.partial(_persist_refreshed, app_uuid, ep_uuid)
 
-    globus_token_life = expires_at_s - time.time()
+    try:
+        https_authorizer, authorizer = _create_authorizers(client, ep_uuid, token_tuple, on_refresh)
+    except globus_sdk.AuthAPIError as e:
+        log.error(f"Authorization API Error: {e.code} - {e.message}")
+        log.error('Globus token refresh failed. Creating a new one')
+        with _TOKEN_LOCK:
+            token_tuple = _cache_tokens(app_uuid, ep_uuid, _interactive_new_token(app_uuid, ep_uuid))
+        https_authorizer, authorizer = _create_authorizers(client, ep_uuid, token_tuple, on_refresh)
+    log.warning('wget token: %s' % https_authorizer.get_authorization_header()[len('Bearer '):])
+
+    globus_token_life = authorizer.expires_at - time.time()
     log.info("Globus access token will expire in %2.2f hours", (globus_token_life/3600))
 
-    client = globus_sdk.NativeAppAuthClient(app_uuid)
-    client.oauth2_start_flow(requested_scopes=[TransferScopes.all, "https://auth.globus.org/scopes/" + ep_uuid + "/https"], refresh_tokens=True)
-
-    # Now we've got the data we need we set the authorizer
-    authorizer = globus_sdk.RefreshTokenAuthorizer(transfer_rt, client, access_token=transfer_at, expires_at=expires_at_s)
-
     ac = globus_sdk.AuthClient(authorizer=authorizer)
     tc = globus_sdk.TransferClient(authorizer=authorizer)
 
     return ac, tc
 
 
+def _retry(func, *args, **kwargs):
+    """
+    Call func, retrying with exponential backoff when it fails with a network error
+    """
+
+    for attempt in range(_NETWORK_RETRIES):
+        try:
+            return func(*args, **kwargs)
+        except globus_sdk.NetworkError as e:
+            if attempt == _NETWORK_RETRIES - 1:
+                raise
+            log.warning('Network error: %s. Retrying in %d s' % (e, 2**attempt))
+            time.sleep(2**attempt)
+
+
 def create_dir(directory, # Directory to be created in the share
                app_uuid,  # Globus App / Client UUID
                ep_uuid):  # Collection UUID
@@ -150,7 +372,7 @@ def create_dir(directory, # Directory to be created in the share
     dir_path = str(directory) + '/'
     ac, tc = create_clients(app_uuid, ep_uuid)
     try:
-        response = tc.operation_mkdir(ep_uuid, path=dir_path)
+        response = _retry(tc.operation_mkdir, ep_uuid, path=dir_path)
         log.info('*** Created folder: %s' % dir_path)
         log.warning(create_folder_link(directory, app_uuid, ep_uuid))
         return True
@@ -159,8 +381,8 @@ def create_dir(directory, # Directory to be created in the share
         log.warning(create_folder_link(directory, app_uuid, ep_uuid))
         # log.error(f"Details: {e.raw_text}")
         return True
-    except:
-        log.error('*** Unknow error')
+    except globus_sdk.GlobusError as e:
+        log.error('*** Unknown error: %s' % e)
         return False
 
 
@@ -181,6 +403,24 @@ def check_folder_exists(directory, app_uuid, ep_uuid):
 
     ac, tc = create_clients(app_uuid, ep_uuid)
 
+    return check_folder_exists_with(tc, ep_uuid, directory)
+
+
+def check_folder_exists_with(tc, ep_uuid, directory):
+    """
+    Check if directory exists using an existing transfer client
+    
+    Parameters
+    ----------
+    tc        : Transfer client
+    ep_uuid   : Collection UUID
+    directory : Directory to be created in the share
+
+    Returns
+    -------
+    Boolean : True if directory exists  
+    """
+
     try:
         tc.operation_ls(ep_uuid, path=directory)
         return True
@@ -209,7 +449,24 @@ def get_user_id(email, app_uuid, ep_uuid):
 
     ac, tc = create_clients(app_uuid, ep_uuid)
 
+    return get_user_id_with(ac, email)
+
+
+def get_user_id_with(ac, email):
+    """
+    Get user id from user email using an existing authorize client
     
+    Parameters
+    ----------
+    ac    : Authorize client
+    email : User email address
+
+    Returns
+    -------
+    string : User ID
+      
+    """
+
     try:
         r = ac.get_identities(usernames=email, provision=True)
         user_id = r['identities'][0]['id']
@@ -221,6 +478,7 @@ def get_user_id(email, app_uuid, ep_uuid):
         else:
             raise e
 
+
 def share(directory,       # Name of the directory to share
           email,           # Email address to share the Globus directory with
           app_uuid,        # Globus App / Client UUID
@@ -244,24 +502,24 @@ def share(directory,       # Name of the directory to share
     Boolean : True if folder is shared
     """
 
-    if check_folder_exists(directory, app_uuid, ep_uuid):
-        ac, tc = create_clients(app_uuid, ep_uuid)
-        user_id = get_user_id(email, app_uuid, ep_uuid)
+    ac, tc = create_clients(app_uuid, ep_uuid)
+    # ac and tc share one authorizer: refresh an expired token once, before both threads use it
+    tc.authorizer.ensure_valid_token()
+    # look the user up while the folder is checked; its result is only used if the folder exists
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_exists = ex.submit(check_folder_exists_with, tc, ep_uuid, directory)
+        f_uid = ex.submit(get_user_id_with, ac, email)
+
+    if f_exists.result():
+        user_id = f_uid.result()
         if user_id != None:
             dir_path = '/' + str(directory) + '/'
             # Set access control and notify user
-            rule_data = {
-              'DATA_TYPE': 'access',
-              'principal_type': 'identity',
-              'principal': user_id,
-              'path': dir_path,
-              'permissions': 'r',
-              'notify_email': email,
-              'notify_message': message
-            }
+            rule_data = _ACL_RULE_TEMPLATE.copy()
+            rule_data.update(principal=user_id, path=dir_path, notify_email=email, notify_message=message)
 
             try: 
-                response = tc.add_endpoint_acl_rule(ep_uuid, rule_data)
+                response = _retry(tc.add_endpoint_acl_rule, ep_uuid, rule_data)
                 log.info('*** Path %s has been shared with %s' % (dir_path, email))
                 log.warning(create_folder_link(directory, app_uuid, ep_uuid))
                 return True
@@ -273,6 +531,9 @@ def share(directory,       # Name of the directory to share
                 else:
                     log.error(f"Transfer API Error: {e.code} - {e.message}")
                     return False
+            except globus_sdk.GlobusError as e:
+                log.error('*** Unknown error: %s' % e)
+                return False
         else:
             log.error('Invalid user id')
     else:
@@ -295,21 +556,57 @@ def find_endpoints(app_uuid, ep_uuid):
     """
 
     ac, tc = create_clients(app_uuid, ep_uuid)
-    
-    my_endpoints ={}
-    endpoints_shared_with_me = {}
-    endpoints_shared_by_me = {}
 
-    for ep in tc.endpoint_search(filter_scope="my-endpoints"):
-        my_endpoints[ep['display_name']] = ep['id']
-    for ep in tc.endpoint_search(filter_scope="shared-with-me"):
-        endpoints_shared_with_me[ep['display_name']] = ep['id']
-    for ep in tc.endpoint_search(filter_scope="shared-by-me"):
-        endpoints_shared_by_me[ep['display_name']] = ep['id']
+    def _search(scope):
+        # requests.Session is not thread-safe: each search gets its own client sharing tc authorizer
+        return list(globus_sdk.TransferClient(authorizer=tc.authorizer).endpoint_search(filter_scope=scope))
+
+    # refresh an expired token once here rather than concurrently in each search
+    tc.authorizer.ensure_valid_token()
+    scopes = ("my-endpoints", "shared-with-me", "shared-by-me")
+    with ThreadPoolExecutor(max_workers=len(scopes)) as ex:
+        my_endpoints, endpoints_shared_with_me, endpoints_shared_by_me = (
+            {ep['display_name']: ep['id'] for ep in endpoints} for endpoints in ex.map(_search, scopes))
 
     return  my_endpoints, endpoints_shared_with_me, endpoints_shared_by_me
 
 
+def _find_endpoint_uuid_direct(tc, ep_name):
+    """
+    Search the endpoints shared by me for ep_name, stopping at the first exact match
+    """
+
+    for ep in tc.endpoint_search(filter_fulltext=ep_name, filter_scope="shared-by-me"):
+        if ep['display_name'] == ep_name:
+            return ep['id']
+
+    return None
+
+
+def find_endpoint_uuid(ep_name, app_uuid, ep_uuid):
+    """
+    Find the UUID of an endpoint shared by me from its name
+
+    Parameters
+    ----------
+    ep_name  : Endpoint name
+    app_uuid : Globus App / Client UUID
+    ep_uuid  : Collection UUID
+
+    Returns
+    -------
+    string : endpoint id, None if no endpoint shared by me has this name
+    """
+
+    ac, tc = create_clients(app_uuid, ep_uuid)
+
+    endpoint_uuid = _find_endpoint_uuid_direct(tc, ep_name)
+    if endpoint_uuid is None:
+        log.error('Endpoint %s not found' % ep_name)
+
+    return endpoint_uuid
+
+
 def create_folder_link(directory, app_uuid, ep_uuid):
     """
     Create link to a shared folder
@@ -327,11 +624,23 @@ def create_folder_link(directory, app_uuid, ep_uuid):
 
     # ac, tc = create_clients(app_uuid, ep_uuid)
 
-    url = 'https://app.globus.org/file-manager?&origin_id='+ep_uuid+'&origin_path=/'+str(directory) #+'/&add_identity='+user_id
+    url = f'https://app.globus.org/file-manager?&origin_id={ep_uuid}&origin_path=/{directory}' #+'/&add_identity='+user_id
 
     return url
 
 
+def _tlsftp_server(tc, ep_uuid):
+    """
+    Return the HTTPS server host name of the endpoint, querying Globus only once per endpoint
+    """
+
+    if ep_uuid not in _TLSFTP_SERVER_CACHE:
+        # strip the 'tlsftp://' prefix and ':443' suffix
+        _TLSFTP_SERVER_CACHE[ep_uuid] = tc.get_endpoint(ep_uuid)['tlsftp_server'][9:-4]
+
+    return _TLSFTP_SERVER_CACHE[ep_uuid]
+
+
 def create_links(directory, app_uuid, ep_uuid):
     """
     Create the links for all items (folder and files) listed in the endpoint directory
@@ -347,22 +656,18 @@ def create_links(directory, app_uuid, ep_uuid):
     lists : [file url],  [folder url]
     """
 
-    file_links   = []
-    folder_links = []
-
     ac, tc = create_clients(app_uuid, ep_uuid)
     files, folders  = find_items(directory, app_uuid, ep_uuid)
 
-    for file_name in files:
-        file_link = 'https://' + tc.get_endpoint(ep_uuid)['tlsftp_server'][9:-4] + '/' + str(directory) + '/' + file_name
-        file_links.append(file_link)
+    base_folder = f'https://app.globus.org/file-manager?&origin_id={ep_uuid}&origin_path={directory}/' #+'/&add_identity='+user_id
+    folder_links = [base_folder + folder for folder in folders]
 
-    for folder in folders:            
-        folder_link = 'https://app.globus.org/file-manager?&origin_id=' + ep_uuid + '&origin_path=' + str(directory) + '/' + folder #+'/&add_identity='+user_id
-        folder_links.append(folder_link)
-        if folder[-4:] == 'zarr':
-            file_link = 'https://' + tc.get_endpoint(ep_uuid)['tlsftp_server'][9:-4] + '/' + str(directory) + '/' + folder
-            file_links.append(file_link)
+    # zarr folders are also downloaded as files
+    file_names = files + [folder for folder in folders if folder[-4:] == 'zarr']
+    file_links = []
+    if file_names:
+        base_file  = f'https://{_tlsftp_server(tc, ep_uuid)}/{directory}/'
+        file_links = [base_file + file_name for file_name in file_names]
 
     return file_links, folder_links
 
@@ -386,13 +691,10 @@ def find_items(directory, app_uuid, ep_uuid):
     files   = []
     folders = []
     try:
-        response = tc.operation_ls(ep_uuid, path=directory)
-        for item in response['DATA']:
-            log.info('directory %s contains %s: %s' % (directory, item['type'], item['name']))
-            if item['type'] == 'file':
-                files.append(item['name'])
-            if item['type'] == 'dir':
-                folders.append(item['name'])
+        data = tc.operation_ls(ep_uuid, path=directory)['DATA']
+        files   = [item['name'] for item in data if item['type'] == 'file']
+        folders = [item['name'] for item in data if item['type'] == 'dir']
+        log.info('directory %s contains %d files, %d folders', directory, len(files), len(folders))
     except globus_sdk.TransferAPIError as e:
         log.error(f"Transfer API Error: {e.code} - {e.message}")
 